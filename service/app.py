@@ -1,17 +1,17 @@
 # service/app.py
-import codecs
 import sys
 import os
 import io
 os.environ["PYTHONUTF8"] = "1"
 os.environ["PYTHONIOENCODING"] = "utf-8"
-if sys.platform == "win32":
-    if hasattr(sys.stdout, 'reconfigure'):
-        sys.stdout.reconfigure(encoding='utf-8', errors='replace')
-        sys.stderr.reconfigure(encoding='utf-8', errors='replace')
-    else:
-        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+# Switch the existing streams to UTF-8 in place (no extra wrapper layer), on
+# every platform: Electron reads these pipes whatever the host locale is
+if hasattr(sys.stdout, 'reconfigure'):
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    sys.stderr.reconfigure(encoding='utf-8', errors='replace')
+else:
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 import shutil
 import tempfile
 import threading
@@ -21,22 +21,71 @@ import uuid
 import zipfile
 import subprocess
 import queue
+import contextlib
 import hashlib
+import json
 import re
+import functools
+import collections
+import sqlite3
 
-from typing import Any, Dict, Generator, List, Optional, cast, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Any, BinaryIO, Dict, Generator, List, Mapping, Optional, cast, Union
 
-from flask import Flask, Response, request, jsonify
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
+from werkzeug.wsgi import FileWrapper
 
 import yt_dlp  # type: ignore[import]
-from yt_dlp.utils import DownloadError  # type: ignore[import]
+from yt_dlp.postprocessor import FFmpegExtractAudioPP, PostProcessor  # type: ignore[import]
+from yt_dlp.utils import DownloadError, make_archive_id  # type: ignore[import]
 from urllib.parse import quote
 
+try:
+    import orjson  # type: ignore[import]
+except ImportError:  # Optional: fall back to the stdlib encoder
+    orjson = None
+
+try:
+    from waitress import serve  # type: ignore[import]
+except ImportError:  # Optional: fall back to Werkzeug's threaded server
+    serve = None
+
 app = Flask(__name__)
 CORS(app)
-APP_TEMP_DIR = os.path.join(tempfile.gettempdir(), "yt-link")
+
+
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
+    # Tuning knobs from the environment; a typo falls back to the default
+    # with a warning instead of stopping the backend from starting
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        value = minimum - 1
+    if value < minimum:
+        print(
+            f"Warning: ignoring {name}={raw!r} (expected an integer >= {minimum}); "
+            f"using {default}",
+            file=sys.stderr,
+            flush=True,
+        )
+        return default
+    return value
+
+
+# Scratch space for downloads and transcodes; point it at fast local storage
+APP_TEMP_DIR = os.environ.get("YTLINK_WORK_DIR") or os.path.join(
+    tempfile.gettempdir(), "yt-link"
+)
+# Where finished files are written and served from. Defaults to the work dir;
+# set it to a capacity disk to keep delivery I/O off the scratch disk.
+OUTPUT_DIR = os.environ.get("YTLINK_OUTPUT_DIR") or APP_TEMP_DIR
 os.makedirs(APP_TEMP_DIR, exist_ok=True)
+os.makedirs(OUTPUT_DIR, exist_ok=True)
 # This will be set at runtime from the command line arguments
 ffmpeg_exe: Optional[str] = None
 node_exe: Optional[str] = None
@@ -46,12 +95,65 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 POTENTIAL_BIN = os.path.join(BASE_DIR, "bin", "ffmpeg.exe" if os.name == "nt" else "ffmpeg")
 if os.path.exists(POTENTIAL_BIN):
     ffmpeg_exe = POTENTIAL_BIN
-# --- Job Queue, Lock, and Retry Settings ---
+# --- Job Pool, Registry, and Retry Settings ---
+# Jobs are only inserted into and popped from this dict (single atomic
+# operations), so lookups need no lock. Each Job publishes an immutable snapshot of its state
+# that status polls read without contending with the worker's progress updates.
 jobs: Dict[str, "Job"] = {}
-jobs_lock = threading.Lock()
-job_queue: queue.Queue["Job"] = queue.Queue()
 MAX_RETRIES = 5
 RETRY_DELAY = 300  # 5 minutes
+METADATA_TTL = 3600  # seconds a cached /get-formats extraction stays valid
+# yt-dlp calls the progress hook for every chunk; the UI polls about once a second
+PROGRESS_INTERVAL = 0.25  # seconds between published download updates
+SSE_KEEPALIVE = 15  # seconds of silence before /job-stream sends a comment
+# Cache dirs are reused across jobs but must not grow without bound: the reaper
+# drops those unused for CACHE_MAX_AGE, then least recently used ones until the
+# total is under CACHE_MAX_BYTES.
+CACHE_MAX_AGE = 7 * 86400  # seconds
+CACHE_MAX_BYTES = _env_int("YTLINK_CACHE_MAX_BYTES", 20 * 1024**3)
+REAP_INTERVAL = 300  # seconds
+# Finished jobs are dropped from the registry by the same reaper once they are
+# older than JOB_TTL, or oldest first while more than JOBS_HIGH_WATER remain.
+JOB_TTL = 6 * 3600  # seconds
+JOBS_HIGH_WATER = 128
+FFMPEG_LOG_LINES = 64  # stderr lines kept from FFmpeg runs for error reports
+# Parallel connections yt-dlp uses for DASH/HLS fragments (its -N option)
+FRAGMENT_CONCURRENCY = _env_int("YTLINK_FRAG_CONCURRENCY", 8)
+MAX_FRAGMENT_CONCURRENCY = 32  # cap for the per-job "concurrency" override
+# Without a valid override, each YoutubeDL tunes its fragment connections from
+# observed throughput (see FragmentWindow) within these bounds. It starts at
+# and never goes above FRAGMENT_CONCURRENCY, so the operator's setting is a cap.
+FRAGMENT_WINDOW_MAX = min(16, FRAGMENT_CONCURRENCY)
+FRAGMENT_WINDOW_MIN = min(2, FRAGMENT_WINDOW_MAX)
+FRAGMENT_ADAPT_INTERVAL = 5.0  # seconds between window adjustments
+# Playlist entries downloaded at once per job (see Job._download_playlist)
+PLAYLIST_WORKERS = _env_int("YTLINK_PLAYLIST_WORKERS", 4)
+# Request threads for the production server; status polls, downloads and
+# /get-formats calls from the UI are served concurrently
+SERVER_THREADS = 16
+# Each open /job-stream holds a request thread; keep at least half of them for
+# everything else. Streams also end after SSE_MAX_LIFETIME and the browser's
+# EventSource reconnects, so a busy slot frees up regularly.
+MAX_SSE_STREAMS = SERVER_THREADS // 2
+SSE_MAX_LIFETIME = 300  # seconds
+sse_slots = threading.BoundedSemaphore(MAX_SSE_STREAMS)
+# Jobs run at once. They are network-bound, so the host's core count says
+# nothing about how many YouTube will tolerate; keep the default small.
+MAX_WORKERS = _env_int("YTLINK_MAX_WORKERS", 4)
+# Videos or playlist entries downloading at once across all jobs, each on up to
+# FRAGMENT_CONCURRENCY connections. Jobs and playlist workers multiply, so this
+# is what keeps a busy backend clear of 429s and bot checks.
+MAX_DOWNLOADS = _env_int("YTLINK_MAX_DOWNLOADS", 4)
+download_slots = threading.BoundedSemaphore(MAX_DOWNLOADS)
+# Worker threads are created lazily and reused; excess jobs wait in the
+# executor's internal queue.
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="ytdl")
+# Playlist tracks are transcoded here, off the download thread. The pool is
+# shared by all jobs so concurrent playlists never run more encodes than cores.
+TRANSCODE_WORKERS = _env_int("YTLINK_TRANSCODE_WORKERS", os.cpu_count() or 1)
+transcode_executor = ThreadPoolExecutor(
+    max_workers=TRANSCODE_WORKERS, thread_name_prefix="ffmpeg"
+)
 
 
 class SafeLogger:
@@ -70,7 +172,252 @@ class SafeLogger:
             pass
 
 
+class BackgroundExtractAudioPP(PostProcessor):
+    # Queues FFmpegExtractAudio for each finished track on transcode_executor and
+    # returns at once, so yt-dlp moves on to the next playlist entry while the
+    # previous ones encode in parallel. Job._finalize waits for the results.
+    # One instance serves all of a job's YoutubeDLs; the FFmpeg step stays
+    # bound to the job's main instance, which Job.run closes only after every
+    # queued transcode has finished.
+    def __init__(self, job: "Job", downloader=None, **extract_opts) -> None:
+        super().__init__(downloader)
+        self._job = job
+        self._extract = FFmpegExtractAudioPP(downloader, **extract_opts)
+
+    def run(self, information):
+        self._job.transcodes.append(
+            transcode_executor.submit(self._transcode, dict(information))
+        )
+        return [], information
+
+    def _transcode(self, information: Dict[str, Any]) -> None:
+        try:
+            files_to_delete, _ = self._extract.run(information)
+        except Exception as e:
+            # Same outcome as yt-dlp with ignoreerrors: report, skip the track.
+            # It stays out of the archive, so a later run fetches it again.
+            print(f"[Transcode Error]: {e}", file=sys.stderr, flush=True)
+            return
+        for path in files_to_delete:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._job.record_archived(information)
+
+
+class FragmentWindow:
+    # AIMD on one YoutubeDL's fragment connections: one more while a
+    # download's throughput keeps improving, half as many once it drops. The
+    # speed is tracked per download, so parallel playlist entries (each on its
+    # own instance) never mix. yt-dlp reads the setting from the instance's
+    # params whenever a download starts, so a new window applies to the next
+    # format, fragment set or playlist entry this instance fetches.
+    def __init__(self, ydl: Any, label: str) -> None:
+        self._params = ydl.params
+        self._label = label
+        self.window = FRAGMENT_WINDOW_MAX
+        self._params["concurrent_fragment_downloads"] = self.window
+        self._download: Optional[str] = None
+        self._ema = 0.0  # smoothed speed of the current download, bytes/s
+        self._prev = 0.0
+        self._window_ts = 0.0
+
+    def __call__(self, d: Dict[str, Any]) -> None:
+        speed = d.get("speed")
+        if d.get("status") != "downloading" or not speed:
+            return
+        now = time.monotonic()
+        if d.get("filename") != self._download:
+            # New download: start measuring afresh, keep the learned window
+            self._download = d.get("filename")
+            self._ema, self._prev, self._window_ts = speed, 0.0, now
+            return
+        self._ema = 0.8 * self._ema + 0.2 * speed
+        if now - self._window_ts < FRAGMENT_ADAPT_INTERVAL:
+            return
+        self._window_ts = now
+        prev, self._prev = self._prev, self._ema
+        if not prev:
+            return
+        window = self.window
+        if self._ema > prev * 1.05:
+            window = min(window + 1, FRAGMENT_WINDOW_MAX)
+        elif self._ema < prev * 0.8:
+            window = max(window // 2, FRAGMENT_WINDOW_MIN)
+        if window != self.window:
+            print(
+                f"[{self._label}] Fragment concurrency {self.window} -> {window} "
+                f"({prev / 1e6:.2f} -> {self._ema / 1e6:.2f} MB/s)",
+                flush=True,
+            )
+            self.window = window
+            self._params["concurrent_fragment_downloads"] = window
+
+
+class MetadataCache:
+    # Process-local TTL cache of yt-dlp info dicts, so a /start-job right after
+    # /get-formats for the same video doesn't extract it from YouTube again.
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._entries: Dict[str, tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def put(self, key: str, info: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, (ts, _) in self._entries.items() if now - ts > self.ttl]
+            for k in expired:
+                del self._entries[k]
+            self._entries[key] = (now, info)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+metadata_cache = MetadataCache(METADATA_TTL)
+
+
+class JobStore:
+    # SQLite record of finished jobs, so /job-status and /download keep working
+    # for them after the backend restarts. Only terminal states are written
+    # (once per job), and never the request body, which may hold cookies.
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                job_type TEXT NOT NULL,
+                url TEXT NOT NULL,
+                status TEXT NOT NULL,
+                message TEXT,
+                error TEXT,
+                file_path TEXT,
+                file_name TEXT,
+                members TEXT,
+                finished_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def row(job: "Job") -> tuple:
+        # Called with the job's lock held, so the row is a consistent copy
+        return (
+            job.job_id,
+            job.job_type,
+            job.url,
+            job.status,
+            job.message,
+            job.error,
+            job.file_path,
+            job.file_name,
+            json.dumps(job.members) if job.members is not None else None,
+            job.finished_at,
+        )
+
+    def save(self, row: tuple) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row
+            )
+            self._conn.commit()
+
+    def load(self, max_age: float) -> List[sqlite3.Row]:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE finished_at < ?", (time.time() - max_age,)
+            )
+            self._conn.commit()
+            self._conn.row_factory = sqlite3.Row
+            try:
+                return self._conn.execute("SELECT * FROM jobs").fetchall()
+            finally:
+                self._conn.row_factory = None
+
+
+# Opened by start_background_services(), so importing the app touches no disk
+job_store: Optional[JobStore] = None
+
+# --- YoutubeDL Pool for /get-formats ---
+FORMATS_YDL_OPTS: Dict[str, Any] = {
+    "verbose": True,
+    "quiet": True,
+    "no_warnings": True,
+    "restrictfilenames": False,
+    "windowfilenames":True,
+    "format": "bestvideo+bestaudio/best",
+    "extract_flat": False,
+    "javascript_runtimes": ['deno','node'],
+    "check_formats": False,
+    "nocheckcertificate": True,
+    "noplaylist": True,
+}
+# Building a YoutubeDL loads the extractor registry and HTTP handlers, and its
+# extractors keep YouTube's player JS cached; keep a few instances warm.
+ydl_pool: queue.Queue = queue.Queue(maxsize=min(8, os.cpu_count() or 1))
+
+
+@contextlib.contextmanager
+def pooled_formats_ydl() -> Generator[Any, None, None]:
+    try:
+        ydl = ydl_pool.get_nowait()
+    except queue.Empty:
+        ydl = yt_dlp.YoutubeDL(cast(Any, FORMATS_YDL_OPTS))
+    try:
+        yield ydl
+    finally:
+        try:
+            ydl_pool.put_nowait(ydl)
+        except queue.Full:
+            ydl.close()
+
+
 class Job:
+    # Jobs live for the whole session; slots keep each one compact and make a
+    # mistyped attribute an error instead of a silent new field
+    __slots__ = (
+        "job_id",
+        "url",
+        "job_type",
+        "data",
+        "status",
+        "message",
+        "progress",
+        "error",
+        "temp_dir",
+        "output_dir",
+        "info",
+        "file_path",
+        "file_name",
+        "members",
+        "transcodes",
+        "_audio_pp",
+        "finished_at",
+        "content_disposition",
+        "_last_progress_ts",
+        "_lock",
+        "_changed",
+        "_resumed",
+        "_pauses",
+        "state",
+        "_status_json",
+    )
+
     def __init__(self, job_id: str, job_type: str, data: Dict[str, Any]) -> None:
         self.job_id: str = job_id
         self.url: str = data.get("url", "")
@@ -80,10 +427,33 @@ class Job:
         self.message: str = "Job is queued..."
         self.progress: Optional[float] = None
         self.error: Optional[str] = None
-        self.temp_dir = get_cache_dir(self.url)
+        self.temp_dir = get_cache_dir(self.url, job_type)
+        self.output_dir = os.path.join(OUTPUT_DIR, os.path.basename(self.temp_dir))
         self.info: Optional[Dict[str, Any]] = None
         self.file_path: Optional[str] = None
         self.file_name: Optional[str] = None
+        # playlistZip and byte-joined combineMp3 jobs are assembled from these
+        # tracks on the fly by /download instead of being written out first
+        self.members: Optional[List[str]] = None
+        # Pending playlist track transcodes (see BackgroundExtractAudioPP)
+        self.transcodes: List[Future] = []
+        self._audio_pp: Optional[BackgroundExtractAudioPP] = None
+        self.finished_at: Optional[float] = None
+        # Built once on completion instead of on every /download request
+        self.content_disposition: Optional[str] = None
+        self._last_progress_ts = 0.0
+        # Serializes writers of this job only; readers use `state` lock-free.
+        # Reentrant so set_status_if can check and update under one hold.
+        self._lock = threading.RLock()
+        # Notified on every published snapshot, for /job-stream subscribers
+        self._changed = threading.Condition(self._lock)
+        # Cleared while the job is paused so the worker can block instead of polling.
+        self._resumed = threading.Event()
+        self._resumed.set()
+        # Bumped on every pause, so a worker can tell its download was cut short
+        self._pauses = 0
+        self.state: Mapping[str, Any] = MappingProxyType(self.to_dict())
+        self._status_json: Optional[tuple[Mapping[str, Any], str, bytes]] = None
 
     def set_status(
         self,
@@ -92,13 +462,18 @@ class Job:
         progress: Optional[float] = None,
         error: Optional[str] = None,
     ) -> None:
-        with jobs_lock:
+        with self._lock:
             if self.status in ["completed", "failed"]:
                 if status not in ["processing", "queued", "downloading"]:
                     return
 
             self.status = status
             self.message = message
+            if status == "paused":
+                self._resumed.clear()
+                self._pauses += 1
+            else:
+                self._resumed.set()
             if progress is not None:
                 self.progress = progress
             if error:
@@ -108,7 +483,32 @@ class Job:
                     print(f"--- [Job {self.job_id}] ERROR: {safe_err}", file=sys.stderr, flush=True)
                 except:
                     pass
-            jobs[self.job_id] = self
+            if status == "completed":
+                self.content_disposition = attachment_header(
+                    self.file_name or f"{self.job_id}.mp3"
+                )
+            # Swap in a fresh snapshot; the reference assignment is atomic.
+            self.state = MappingProxyType(self.to_dict())
+            self._changed.notify_all()
+            row = None
+            if status in ("completed", "failed"):
+                self.finished_at = time.time()
+                row = JobStore.row(self)
+        # The SQLite write can block on fsync; keep it out of the job's lock
+        if row is not None and job_store is not None:
+            try:
+                job_store.save(row)
+            except sqlite3.Error as e:
+                print(f"Warning: could not record job {self.job_id}: {e}", flush=True)
+
+    def set_status_if(self, expected: List[str], status: str, message: str) -> bool:
+        # Atomic check-and-set for the API endpoints, so e.g. a job that
+        # completes between the check and the update is never re-paused.
+        with self._lock:
+            if self.status not in expected:
+                return False
+            self.set_status(status, message)
+            return True
 
     # --- MODIFIED: This method now has the new logging logic ---
     def update_progress(self, d: Dict[str, Any]) -> None:
@@ -117,6 +517,11 @@ class Job:
 
         status = d.get("status")
         if status == "downloading":
+            now = time.monotonic()
+            if now - self._last_progress_ts < PROGRESS_INTERVAL:
+                return
+            self._last_progress_ts = now
+
             progress_val = None
             total = d.get("total_bytes") or d.get("total_bytes_estimate")
             if total:
@@ -198,17 +603,29 @@ class Job:
             "socket_timeout": 30,
             "retries": 3,
             "fragment_retries": 3,
-            "download_archive": os.path.join(self.temp_dir, "downloaded.txt"),
+            # Fetch DASH/HLS fragments in parallel and range-request progressive
+            # formats in chunks instead of one long serial stream
+            "concurrent_fragment_downloads": self._fragment_concurrency(),
+            "http_chunk_size": 10 * 1024 * 1024,
+            # yt-dlp starts every request (each fragment and chunk) reading 1 KiB
+            # blocks and only then grows them; start at 64 KiB instead
+            "buffersize": 1 << 16,
         }
 
         if self.job_type == "singleVideo":
             selected_format = self.data.get("format") or self.data.get("quality")
 
             if selected_format:
-                quality = f"{selected_format}+bestaudio/best"
+                # yt-dlp merges with a stream copy; pairing the video with an AAC
+                # track gives a standard MP4 instead of Opus-in-MP4
+                quality = (
+                    f"{selected_format}+bestaudio[ext=m4a]/"
+                    f"{selected_format}+bestaudio/best"
+                )
             else:
+                # No quality picked: prefer streams that mux-copy into MP4
                 quality = (
-                    "bestaudio/best"
+                    "bestvideo[ext=mp4]+bestaudio[ext=m4a]/bestvideo+bestaudio/best"
                 )
 
             ydl_opts.update(
@@ -219,68 +636,291 @@ class Job:
             "windowfilenames":True,
                     "noplaylist": True,
                     "merge_output_format": "mp4",
+                    # A single-file download (no merge) may be WebM/MKV, but
+                    # _finalize names the result .mp4: stream-copy it into an
+                    # MP4 container. yt-dlp skips files that already are MP4.
+                    "postprocessors": [
+                        {"key": "FFmpegVideoRemuxer", "preferedformat": "mp4"}
+                    ],
                 }
             )
         else:  # Audio jobs
+            # combineMp3 tracks are encoded straight to uniform CBR MP3 (no Xing
+            # header) so _finalize can join them by plain byte concatenation.
+            is_combine = self.job_type == "combineMp3"
+            # Playlist jobs transcode on transcode_executor instead; run()
+            # registers a BackgroundExtractAudioPP for them
+            postprocessors = (
+                []
+                if self.job_type in ["playlistZip", "combineMp3"]
+                else [{"key": "FFmpegExtractAudio", **self._extract_audio_opts()}]
+            )
             ydl_opts.update(
                 {
-                    "format": "bestaudio/best",
+                    # An AAC stream only needs a container copy to become .m4a,
+                    # so prefer it over re-encoding Opus; MP3 is encoded anyway
+                    "format": (
+                        "bestaudio/best"
+                        if is_combine
+                        else "bestaudio[ext=m4a]/bestaudio/best"
+                    ),
                     "outtmpl": output_template,
                     "noplaylist": self.job_type == "singleMp3",
                     "ignoreerrors": True,
                     "restrictfilenames": False,
             "windowfilenames":True,
                     "ffmpeg_location": ffmpeg_exe,
-                    "postprocessors": [
-                        {
-                            "key": "FFmpegExtractAudio",
-                            "preferredcodec": "m4a",
-                            "preferredquality": "192",
-                        }
-                    ],
-                    "postprocessor_args": [],
+                    "postprocessors": postprocessors,
+                    # Playlist tracks encode concurrently on transcode_executor,
+                    # so keep each FFmpeg to one thread rather than having them
+                    # all spawn a thread per core; a single track gets them all.
+                    # libmp3lame's compression_level is LAME's -q: 0 is the
+                    # slowest, 5 encodes ~20% faster than the default at 192k.
+                    "postprocessor_args": {
+                        "extractaudio+ffmpeg_o": (
+                            [
+                                "-threads", "1", "-ar", "44100", "-write_xing", "0",
+                                "-compression_level", "5",
+                            ]
+                            if is_combine
+                            else ["-threads", "1" if self.job_type == "playlistZip" else "0"]
+                        )
+                    },
                     "keepvideo": False,
                 }
             )
 
-        if self.data.get("cookies"):
-            cookie_file = os.path.join(APP_TEMP_DIR, f"cookies_{self.job_id}.txt")
-            with open(cookie_file, "w", encoding="utf-8", errors="replace") as f:
-                f.write(self.data["cookies"])
+        cookie_file = write_cookie_file(self.data.get("cookies"), f"cookies_{self.job_id}_")
+        if cookie_file:
             ydl_opts["cookiefile"] = cookie_file
 
         return ydl_opts
 
+    def _fragment_override(self) -> Optional[int]:
+        # Optional per-job override from /start-job ("concurrency"), like
+        # yt-dlp's --concurrent-fragments; None when absent or not a number
+        try:
+            requested = int(self.data.get("concurrency"))  # type: ignore[arg-type]
+        except (TypeError, ValueError):
+            return None
+        return max(1, min(requested, MAX_FRAGMENT_CONCURRENCY))
+
+    def _fragment_concurrency(self) -> int:
+        override = self._fragment_override()
+        return FRAGMENT_CONCURRENCY if override is None else override
+
+    def _new_ydl(
+        self, ydl_opts: Dict[str, Any], cookiejar: Any = None
+    ) -> yt_dlp.YoutubeDL:
+        ydl = yt_dlp.YoutubeDL(cast(Any, ydl_opts))
+        if cookiejar is not None:
+            # YoutubeDL.cookiejar is a cached_property that parses the cookie
+            # file on first use; seed it so the instances of one job share a
+            # single parsed jar (CookieJar does its own locking)
+            ydl.__dict__["cookiejar"] = cookiejar
+        if self._fragment_override() is None:
+            ydl.add_progress_hook(FragmentWindow(ydl, self.job_id))
+        if self.job_type in ["playlistZip", "combineMp3"]:
+            if self._audio_pp is None:
+                self._audio_pp = BackgroundExtractAudioPP(
+                    self, ydl, **self._extract_audio_opts()
+                )
+            ydl.add_post_processor(self._audio_pp, when="post_process")
+        return ydl
+
+    def _archive_path(self) -> str:
+        return os.path.join(self.temp_dir, "downloaded.txt")
+
+    def _archived_ids(self) -> set:
+        # Playlist tracks finished (downloaded and transcoded) by earlier runs,
+        # in yt-dlp's download-archive format. yt-dlp's own archive option isn't
+        # used: it records a track before its background transcode is done.
+        try:
+            with open(self._archive_path(), encoding="utf-8") as f:
+                return {line.strip() for line in f if line.strip()}
+        except OSError:
+            return set()
+
+    def record_archived(self, info: Dict[str, Any]) -> None:
+        extractor = info.get("extractor_key") or info.get("ie_key")
+        if not extractor or not info.get("id"):
+            return
+        with self._lock:
+            with open(self._archive_path(), "a", encoding="utf-8") as f:
+                f.write(make_archive_id(extractor, info["id"]) + "\n")
+
+    def _list_playlist(self, cookie_file: Optional[str] = None) -> Dict[str, Any]:
+        opts: Dict[str, Any] = {
+            "quiet": True,
+            "noprogress": True,
+            "nocheckcertificate": True,
+            "extract_flat": "in_playlist",
+        }
+        if cookie_file:
+            opts["cookiefile"] = cookie_file
+        with yt_dlp.YoutubeDL(cast(Any, opts)) as ydl:
+            return ydl.extract_info(self.url, download=False)
+
+    def _download_playlist(
+        self,
+        ydl: yt_dlp.YoutubeDL,
+        ydl_opts: Dict[str, Any],
+        listing: Optional[Dict[str, Any]],
+    ) -> Optional[Dict[str, Any]]:
+        # yt-dlp walks a playlist one entry at a time; list it flat instead and
+        # download the entries on PLAYLIST_WORKERS threads, each with its own
+        # YoutubeDL (instances are not safe to share across threads).
+        if listing is None:
+            listing = self._list_playlist(ydl_opts.get("cookiefile"))
+        if not listing or listing.get("_type") != "playlist":
+            # Not a playlist after all: download it as-is
+            if not listing:
+                return None
+            with download_slots:
+                return ydl.process_ie_result(listing, download=True)
+
+        entries = [e for e in listing.get("entries") or [] if e]
+        extra_info = {
+            "playlist": listing.get("title"),
+            "playlist_id": listing.get("id"),
+            "playlist_title": listing.get("title"),
+            "playlist_count": len(entries),
+        }
+        # Tracks recorded in the cache dir's archive need no extraction at all
+        archived = self._archived_ids()
+        pending = [
+            (index, entry)
+            for index, entry in enumerate(entries, 1)
+            if not (
+                entry.get("ie_key")
+                and entry.get("id")
+                and make_archive_id(entry["ie_key"], entry["id"]) in archived
+            )
+        ]
+
+        ydls: queue.Queue = queue.Queue()
+        ydls.put(ydl)
+        cookiejar = ydl.cookiejar if ydl_opts.get("cookiefile") else None
+        extra_ydls = [
+            self._new_ydl(ydl_opts, cookiejar)
+            for _ in range(min(PLAYLIST_WORKERS, len(pending)) - 1)
+        ]
+        for extra_ydl in extra_ydls:
+            ydls.put(extra_ydl)
+        try:
+            with ThreadPoolExecutor(
+                max_workers=max(1, ydls.qsize()), thread_name_prefix="ytdl-entry"
+            ) as pool:
+                futures = [
+                    pool.submit(
+                        self._download_entry,
+                        ydls,
+                        entry,
+                        {**extra_info, "playlist_index": index},
+                    )
+                    for index, entry in pending
+                ]
+                for future in futures:
+                    future.result()
+        finally:
+            for extra_ydl in extra_ydls:
+                extra_ydl.close()
+        return listing
+
+    def _download_entry(
+        self, ydls: queue.Queue, entry: Dict[str, Any], extra_info: Dict[str, Any]
+    ) -> None:
+        ydl = ydls.get()
+        try:
+            while True:
+                self._resumed.wait()
+                pauses = self._pauses
+                try:
+                    with download_slots:
+                        result = ydl.process_ie_result(
+                            dict(entry), download=True, extra_info=extra_info
+                        )
+                except DownloadError as e:
+                    if self._pauses != pauses:
+                        # Interrupted by a pause: fetch the entry again on resume
+                        continue
+                    # Same as yt-dlp's ignoreerrors for playlists: skip the entry
+                    print(f"[Playlist entry failed]: {e}", file=sys.stderr, flush=True)
+                    return
+                # With ignoreerrors, yt-dlp swallows the DownloadError the
+                # progress hook raises on pause and just returns None
+                if result is None and self._pauses != pauses:
+                    continue
+                return
+        finally:
+            ydls.put(ydl)
+
+    def _extract_audio_opts(self) -> Dict[str, Any]:
+        return {
+            "preferredcodec": "mp3" if self.job_type == "combineMp3" else "m4a",
+            "preferredquality": "192",
+        }
+
+    def _wait_for_transcodes(self) -> None:
+        pending, self.transcodes = self.transcodes, []
+        for done, future in enumerate(pending, 1):
+            future.result()
+            self.set_status(
+                "processing", f"Converting tracks ({done}/{len(pending)})...", self.progress
+            )
+
     def _progress_hook(self, d: Dict[str, Any]) -> None:
         self.update_progress(d)
 
 
     def run(self) -> None:
-        pause_timeout = 0
-        while self.status == "paused":
-            if pause_timeout > 3600:
+        # Jobs for the same link and type share a cache dir; only one of them
+        # may download into it at a time. The next one then finds its files.
+        with cache_dir_lock(self.temp_dir, self._on_cache_dir_busy):
+            self._run_in_cache_dir()
+
+    def _on_cache_dir_busy(self) -> None:
+        self.set_status_if(
+            ["queued"], "queued", "Waiting for the same download in another job..."
+        )
+
+    def _run_in_cache_dir(self) -> None:
+        if self.status == "paused":
+            self.set_status("paused", "Job is paused. Waiting for resume...")
+            if not self._resumed.wait(timeout=3600):
                 self.set_status("failed", "Job timed out while paused.")
                 return
-            self.set_status("paused", "Job is paused. Waiting for resume...")
-            time.sleep(2)
-            pause_timeout += 2
 
         self.set_status("processing", "Preparing download...", 0)
 
         os.makedirs(self.temp_dir, exist_ok=True)
+        # Mark the cache dir as recently used for the LRU reaper
+        os.utime(self.temp_dir)
 
-        existing_mp3s = [
-            f
-            for f in os.listdir(self.temp_dir)
-            if f.lower().endswith(".mp3") and not f.endswith("(Combined).mp3")
-        ]
+        prefetched_info: Optional[Dict[str, Any]] = None
+        cache_key = metadata_cache_key(self.url, self.data.get("cookies"))
+        if self.job_type in ["singleMp3", "singleVideo"]:
+            cached = metadata_cache.get(cache_key)
+            if cached is not None:
+                # Clean copy, as for --load-info-json, so processing it for the
+                # download doesn't mutate the shared cache entry. sanitize_info
+                # rebuilds every nested container but setdefaults a few keys on
+                # the top-level dict first, so hand it a shallow copy.
+                prefetched_info = yt_dlp.YoutubeDL.sanitize_info(dict(cached), True)
+        with os.scandir(self.temp_dir) as it:
+            existing_mp3s = [
+                e.name
+                for e in it
+                if os.path.splitext(e.name)[1].lower() == ".mp3"
+                and not e.name.endswith("(Combined).mp3")
+            ]
 
         if existing_mp3s and self.job_type in ["playlistZip", "combineMp3"]:
             try:
-                with yt_dlp.YoutubeDL(
-                    {"quiet": True, "noprogress": True, "nocheckcertificate": True}
-                ) as ydl:
-                    self.info = ydl.extract_info(self.url, download=False)
+                # Only the track count and playlist title are needed here, so list
+                # the entries without resolving each video; the download resolves
+                # them once when this listing is reused below.
+                self.info = self._list_playlist()
 
                 playlist_count = self.info.get("playlist_count") or len(
                     self.info.get("entries", [])
@@ -295,6 +935,7 @@ class Job:
                     self._finalize(self.info)
                     return
                 else:
+                    prefetched_info = self.info
                     print(
                         f"Cache incomplete ({len(existing_mp3s)}/{playlist_count}). Downloading missing tracks..."
                     )
@@ -302,74 +943,104 @@ class Job:
                 print(f"Cache validation failed: {e}")
 
         ydl_opts = self._build_ydl_opts()
-        if self.job_type in ["singleMp3", "singleVideo"]:
-            if "download_archive" in ydl_opts:
-                del ydl_opts["download_archive"]
 
         retries = 0
         success = False
         last_error_str = ""
+        used_prefetched = False
 
-        # Main Download Loop with Full Retry Logic
-        while retries < MAX_RETRIES and not success:
-            while self.status == "paused":
-                self.set_status("paused", "Download paused. Waiting for resume...")
-                time.sleep(1)
+        ydl = None
+        # The cookie file holds credentials; remove it however the loop exits
+        try:
+            # One YoutubeDL serves every attempt; constructing it loads the
+            # extractor registry and sets up its HTTP handlers, so don't repeat
+            # that per retry.
+            ydl = self._new_ydl(ydl_opts)
 
-            try:
-                if retries > 0:
-                    self.set_status(
-                        "processing",
-                        f"Retrying... (Attempt {retries + 1}/{MAX_RETRIES})",
-                        self.progress or 0,
-                    )
+            # Main Download Loop with Full Retry Logic
+            while retries < MAX_RETRIES and not success:
+                if self.status == "paused":
+                    self.set_status("paused", "Download paused. Waiting for resume...")
+                    self._resumed.wait()
+
+                try:
+                    if retries > 0:
+                        self.set_status(
+                            "processing",
+                            f"Retrying... (Attempt {retries + 1}/{MAX_RETRIES})",
+                            self.progress or 0,
+                        )
 
-                with yt_dlp.YoutubeDL(cast(Any, ydl_opts)) as ydl:
-                    info_dict = ydl.extract_info(self.url, download=True)
+                    used_prefetched = prefetched_info is not None
+                    if self.job_type in ["playlistZip", "combineMp3"]:
+                        cached_info, prefetched_info = prefetched_info, None
+                        info_dict = self._download_playlist(ydl, ydl_opts, cached_info)
+                    elif prefetched_info is not None:
+                        # Reuse metadata we already have (cache check or
+                        # /get-formats) instead of extracting it again. Retries
+                        # re-extract in case the stream URLs in it have expired.
+                        cached_info, prefetched_info = prefetched_info, None
+                        with download_slots:
+                            info_dict = ydl.process_ie_result(cached_info, download=True)
+                    else:
+                        with download_slots:
+                            info_dict = ydl.extract_info(self.url, download=True)
                     if not info_dict:
                         raise DownloadError("Failed to extract video information.")
                     self.info = info_dict
 
-                self._finalize(self.info)
-                success = True
-
-            except DownloadError as e:
-                last_error_str = str(e)
-                if "rate-limit" in last_error_str.lower() or "429" in last_error_str:
-                    self.set_status(
-                        "failed",
-                        "Rate limited by YouTube. Wait 1 hour.",
-                        error=last_error_str,
-                    )
-                    return
-
-                if "HTTP Error 403" in last_error_str:
-                    retries += 1
-                    if retries < MAX_RETRIES:
-                        time.sleep(RETRY_DELAY)
-                    else:
+                    self._finalize(self.info)
+                    success = True
+
+                except DownloadError as e:
+                    last_error_str = str(e)
+                    if used_prefetched:
+                        # Reused metadata may be stale; retry at once with a fresh
+                        # extraction before applying the normal error handling
+                        metadata_cache.invalidate(cache_key)
+                        continue
+                    if "rate-limit" in last_error_str.lower() or "429" in last_error_str:
                         self.set_status(
                             "failed",
-                            "Failed after max retries (403 Forbidden).",
+                            "Rate limited by YouTube. Wait 1 hour.",
                             error=last_error_str,
                         )
-                else:
-                    self.set_status("failed", "Download failed.", error=last_error_str)
+                        return
+
+                    if "HTTP Error 403" in last_error_str:
+                        retries += 1
+                        if retries < MAX_RETRIES:
+                            time.sleep(RETRY_DELAY)
+                        else:
+                            self.set_status(
+                                "failed",
+                                "Failed after max retries (403 Forbidden).",
+                                error=last_error_str,
+                            )
+                    else:
+                        self.set_status("failed", "Download failed.", error=last_error_str)
+                        break
+                except Exception:
+                    self.set_status(
+                        "failed",
+                        "A processing error occurred.",
+                        error=traceback.format_exc(),
+                    )
                     break
-            except Exception:
-                self.set_status(
-                    "failed",
-                    "A processing error occurred.",
-                    error=traceback.format_exc(),
-                )
-                break
-
-        cookie_file = ydl_opts.get("cookiefile")
-        if cookie_file and os.path.exists(cookie_file):
-            try:
-                os.remove(cookie_file)
-            except OSError as e:
-                print(f"Warning: could not delete cookie file: {e}")
+        finally:
+            # A failed attempt can leave transcodes queued; they log through
+            # the main YoutubeDL, so let them finish before it is closed
+            pending, self.transcodes = self.transcodes, []
+            for future in pending:
+                future.exception()
+            if ydl is not None:
+                ydl.close()
+            cookie_file = ydl_opts.get("cookiefile")
+            if cookie_file and os.path.exists(cookie_file):
+                try:
+                    os.remove(cookie_file)
+                except OSError as e:
+                    print(f"Warning: could not delete cookie file: {e}")
 
     def _finalize(self,info) -> None:
         def sanitize_for_windows(msg):
@@ -394,6 +1065,9 @@ class Job:
         except Exception as e:
             sanitize_for_windows(f"Logging error: {e}")
         
+        # Tracks may still be encoding in the background
+        self._wait_for_transcodes()
+
         # Update status to indicate finalization has started
         self.set_status("processing", "Finalizing files...", self.progress or 100)
         time.sleep(2)
@@ -405,26 +1079,40 @@ class Job:
 
         # Logic for processing a single video download
         if self.job_type == "singleVideo":
-            # Define acceptable video formats
-            video_extensions = [".mp4", ".mkv", ".webm", ".mov", ".avi"]
-            # Scan directory for completed video files, excluding active partial downloads
-            found_files = [
-                f
-                for f in os.listdir(self.temp_dir)
-                if os.path.splitext(f)[1].lower() in video_extensions
-                and not f.endswith(".part")
+            # yt-dlp records the final (merged/remuxed) path of what it wrote
+            downloaded = [
+                d["filepath"]
+                for d in self.info.get("requested_downloads") or []
+                if d.get("filepath") and os.path.isfile(d["filepath"])
             ]
-            
-            if not found_files:
-                raise Exception("No final video file found after download.")
-            
-            # Identify the raw downloaded file and prepare the sanitized destination name
-            original_filename = found_files[0]
-            original_filepath = os.path.join(self.temp_dir, original_filename)
+            if downloaded:
+                original_filepath = downloaded[0]
+                original_filename = os.path.basename(original_filepath)
+            else:
+                # Fall back to scanning the directory for a completed video
+                # file; matching the extension also excludes partial downloads
+                video_extensions = {".mp4", ".mkv", ".webm", ".mov", ".avi"}
+                with os.scandir(self.temp_dir) as it:
+                    found_files = [
+                        e
+                        for e in it
+                        if os.path.splitext(e.name)[1].lower() in video_extensions
+                        and e.is_file()
+                    ]
+
+                if not found_files:
+                    raise Exception("No final video file found after download.")
+
+                # Take the largest, should a stray format file be left next to
+                # the merged output. DirEntry caches its stat result.
+                largest = max(found_files, key=lambda e: e.stat().st_size)
+                original_filename = largest.name
+                original_filepath = largest.path
             video_title = self.info.get("title", "video")
 
             self.file_name = sanitize_filename(f"{video_title}.mp4")
-            self.file_path = os.path.join(self.temp_dir, self.file_name)
+            os.makedirs(self.output_dir, exist_ok=True)
+            self.file_path = os.path.join(self.output_dir, self.file_name)
 
             def safe_print(msg):
                 try:
@@ -432,10 +1120,11 @@ class Job:
                 except UnicodeEncodeError:
                     print(msg.encode('ascii', 'ignore').decode('ascii'), flush=True)
 
-            # Rename the file to the clean, sanitized title if necessary
+            # Rename the file to the clean, sanitized title if necessary (a
+            # move when the output dir is on another disk)
             if original_filepath != self.file_path:
                 try:
-                    os.rename(original_filepath, self.file_path)
+                    shutil.move(original_filepath, self.file_path)
                     safe_print(f"Renamed '{original_filename}' to '{self.file_name}'")
                 except OSError as e:
                     safe_print(f"Warning: Could not rename file. Error: {e}")
@@ -447,18 +1136,18 @@ class Job:
         # Logic for processing audio-based jobs (Single MP3, ZIP, or Combined)
         else:
             time.sleep(1)
-            all_files = os.listdir(self.temp_dir)
+            # scandir hands back names and full paths in one pass over the directory
+            with os.scandir(self.temp_dir) as it:
+                entries = [e for e in it if e.is_file()]
+            all_files = [e.name for e in entries]
             sanitize_for_windows(f"DEBUG: Files in temp_dir: {str(all_files)}")
             # Look for common audio formats to ensure we don't miss files that failed MP3 conversion
-            audio_extensions = (".mp3", ".m4a", ".webm")
+            audio_extensions = {".mp3", ".m4a", ".webm"}
             audio_files = sorted(
-                [
-                    os.path.join(self.temp_dir, f)
-                    for f in all_files
-                    if f.lower().endswith(audio_extensions)
-                    and not f.endswith("(Combined).mp3")
-                    and not f.endswith(".zip")
-                ]
+                e.path
+                for e in entries
+                if os.path.splitext(e.name)[1].lower() in audio_extensions
+                and not e.name.endswith("(Combined).mp3")
             )
 
             if not audio_files:
@@ -476,11 +1165,14 @@ class Job:
                 original_filepath = audio_files[0]
                 track_title = self.info.get("title", "track")
                 self.file_name = sanitize_filename(f"{track_title}.mp3")
-                self.file_path = os.path.join(self.temp_dir, self.file_name)
+                os.makedirs(self.output_dir, exist_ok=True)
+                self.file_path = os.path.join(self.output_dir, self.file_name)
 
+                # Rename to the clean title while moving it out of scratch (a
+                # copy when the output dir is on another disk)
                 if original_filepath != self.file_path:
                     try:
-                        os.rename(original_filepath, self.file_path)
+                        shutil.move(original_filepath, self.file_path)
                         print(
                             f"Renamed '{os.path.basename(original_filepath)}' to '{self.file_name}'"
                         )
@@ -498,61 +1190,72 @@ class Job:
                         os.path.basename(original_filepath)
                     )
             
-            # Handle creating a ZIP archive of all playlist tracks
+            # Handle creating a ZIP archive of all playlist tracks. The archive is
+            # built on the fly by /download (see stream_zip), so the tracks are
+            # never copied into a second file on disk
             elif self.job_type == "playlistZip":
-                self.set_status("processing", "Creating ZIP archive...", self.progress)
-                time.sleep(1.5)
                 self.file_name = f"{playlist_title}.zip"
-                self.file_path = os.path.join(self.temp_dir, self.file_name)
-
-                with zipfile.ZipFile(self.file_path, "w") as zipf:
-                    for audio_file in audio_files:
-                        zipf.write(audio_file, os.path.basename(audio_file))
+                self.members = audio_files
 
             # Handle combining all playlist tracks into a single MP3 file
             elif self.job_type == "combineMp3":
                 self.set_status("processing", "Combining all tracks...", self.progress)
                 self.file_name = f"{playlist_title} (Combined).mp3"
-                self.file_path = os.path.join(self.temp_dir, self.file_name)
-                concat_list_path = os.path.join(self.temp_dir, "concat_list.txt")
-                
-                # Create a temporary manifest file for FFmpeg concatenation
-                with open(concat_list_path, "w", encoding="utf-8", errors="replace") as f:
-                    for audio_file in audio_files:
+
+                mp3_formats = {
+                    read_mp3_format(f) if f.lower().endswith(".mp3") else None
+                    for f in audio_files
+                }
+                if len(mp3_formats) == 1 and None not in mp3_formats:
+                    # Every track is MP3 with the same sample rate: frames can be
+                    # appended as-is, no FFmpeg decode/encode needed, so /download
+                    # joins them while streaming (see stream_concat) and the
+                    # combined file never touches the disk.
+                    self.members = audio_files
+                else:
+                    os.makedirs(self.output_dir, exist_ok=True)
+                    self.file_path = os.path.join(self.output_dir, self.file_name)
+
+                    # Build the FFmpeg concat manifest in memory and feed it over stdin
+                    # rather than writing a temporary list file next to the tracks.
+                    # Entries need an explicit file: protocol, otherwise FFmpeg resolves
+                    # them relative to the pipe: URL.
+                    concat_list = "".join(
                         # Escape single quotes in filenames for FFmpeg compatibility
-                        escaped = audio_file.replace("'", "'\\''")
-                        f.write(f"file '{escaped}'\n")
-
-                # Execute FFmpeg to merge tracks; uses re-encoding to ensure consistent MP3 output
-                command = [
-                    ffmpeg_exe,
-                    "-f",
-                    "concat",
-                    "-safe",
-                    "0",
-                    "-i",
-                    concat_list_path,
-                    "-c:a",
-                    "libmp3lame",
-                    "-q:a",
-                    "2",
-                    "-y",
-                    self.file_path,
-                ]
-                env = os.environ.copy()
-                env["PYTHONIOENCODING"] = "utf-8"
+                        "file 'file:{}'\n".format(audio_file.replace("'", "'\\''"))
+                        for audio_file in audio_files
+                    )
 
-                process = subprocess.run(
-                    command, capture_output=True, text=True, encoding="utf-8", env=env
-                )
-                
-                if process.returncode != 0:
-                    raise Exception(f"FFMPEG Concat Error: {process.stderr}")
+                    # Execute FFmpeg to merge tracks; uses re-encoding to ensure consistent MP3 output
+                    command = [
+                        ffmpeg_exe,
+                        "-nostdin",
+                        "-hide_banner",
+                        "-loglevel",
+                        "error",
+                        "-f",
+                        "concat",
+                        "-safe",
+                        "0",
+                        "-protocol_whitelist",
+                        "pipe,file",
+                        "-i",
+                        "pipe:0",
+                        "-c:a",
+                        "libmp3lame",
+                        "-q:a",
+                        "2",
+                        "-y",
+                        self.file_path,
+                    ]
+                    returncode, stderr_tail = run_ffmpeg(command, concat_list)
+                    if returncode != 0:
+                        raise Exception(f"FFMPEG Concat Error: {stderr_tail}")
 
         # Mark job as fully successful
         self.set_status("completed", "Processing complete!", 100)
 
-        for extra in ["downloaded.txt", "download_log.txt", "concat_list.txt"]:
+        for extra in ["downloaded.txt", "download_log.txt"]:
             extra_path = os.path.join(self.temp_dir, extra)
             if os.path.exists(extra_path):
                 try:
@@ -560,6 +1263,41 @@ class Job:
                 except:
                     pass
 
+    def status_json(self) -> tuple[str, bytes]:
+        # Status polls mostly see an unchanged snapshot; encode it (and derive
+        # its ETag) once per change rather than once per poll.
+        state = self.state
+        cached = self._status_json
+        if cached is None or cached[0] is not state:
+            body = encode_json(dict(state))
+            cached = (state, hashlib.md5(body).hexdigest(), body)
+            self._status_json = cached
+        return cached[1], cached[2]
+
+    def wait_for_change(self, seen: Mapping[str, Any], timeout: float) -> Mapping[str, Any]:
+        # Blocks until a snapshot other than `seen` is published (or timeout)
+        with self._changed:
+            self._changed.wait_for(lambda: self.state is not seen, timeout)
+            return self.state
+
+    @classmethod
+    def restore(cls, row: Mapping[str, Any]) -> "Job":
+        job = cls(row["job_id"], row["job_type"], {"url": row["url"]})
+        job.status = row["status"]
+        job.message = row["message"]
+        job.error = row["error"]
+        job.progress = 100 if row["status"] == "completed" else None
+        job.file_path = row["file_path"]
+        job.file_name = row["file_name"]
+        if row["members"] is not None:
+            job.members = json.loads(row["members"])
+        job.finished_at = row["finished_at"]
+        job.content_disposition = attachment_header(
+            job.file_name or f"{job.job_id}.mp3"
+        )
+        job.state = MappingProxyType(job.to_dict())
+        return job
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "job_id": self.job_id,
@@ -573,7 +1311,153 @@ class Job:
         }
 
 
-def get_cache_dir(url: str) -> str:
+def encode_json(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def write_cookie_file(cookies: Optional[str], prefix: str) -> Optional[str]:
+    # Blank cookie payloads are treated as none, so no credentials file is
+    # created for them. mkstemp creates the file owner-only (0600); a failed
+    # write removes it rather than leaving a partial cookie jar behind.
+    cookies = (cookies or "").strip()
+    if not cookies:
+        return None
+    with tempfile.NamedTemporaryFile(
+        "w",
+        delete=False,
+        dir=APP_TEMP_DIR,
+        prefix=prefix,
+        suffix=".txt",
+        encoding="utf-8",
+        errors="replace",
+    ) as f:
+        try:
+            f.write(cookies)
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    return f.name
+
+
+def metadata_cache_key(url: str, cookies: Optional[str] = None) -> str:
+    # /get-formats runs with noplaylist, so key on the bare video URL; a cookie
+    # digest keeps authenticated results apart from anonymous ones
+    key = sanitize_url_for_job(url, "singleVideo")
+    cookies = (cookies or "").strip()
+    if cookies:
+        key += "#" + hashlib.md5(cookies.encode("utf-8")).hexdigest()
+    return key
+
+
+class _ZipStreamSink:
+    # Write-only target for ZipFile; having no tell/seek makes zipfile use data
+    # descriptors, so the archive can be emitted front to back
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def fadvise(fd: int, advice: str) -> None:
+    # Page-cache hints for outputs that are read once on their way to the
+    # client: read ahead while streaming, then drop the pages so a multi-GB
+    # download doesn't evict hotter data. No-op where unsupported (Windows/macOS).
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, getattr(os, advice))
+    except (AttributeError, OSError):
+        pass
+
+
+def drop_page_cache(path: str) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        fadvise(fd, "POSIX_FADV_DONTNEED")
+    finally:
+        os.close(fd)
+
+
+def stream_zip(paths: List[str]) -> Generator[bytes, None, None]:
+    sink = _ZipStreamSink()
+    # Tracks are already compressed audio, so store them as-is rather than
+    # spending CPU on DEFLATE for <1% savings
+    with zipfile.ZipFile(
+        cast(Any, sink), "w", compression=zipfile.ZIP_STORED, allowZip64=True
+    ) as zipf:
+        for path in paths:
+            zinfo = zipfile.ZipInfo.from_file(path, os.path.basename(path))
+            zinfo.compress_type = zipfile.ZIP_STORED
+            with open(path, "rb") as src, zipf.open(zinfo, "w") as dst:
+                fadvise(src.fileno(), "POSIX_FADV_SEQUENTIAL")
+                while True:
+                    chunk = src.read(1 << 20)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    yield sink.drain()
+                fadvise(src.fileno(), "POSIX_FADV_DONTNEED")
+    # Last data descriptor and the central directory are written on close
+    yield sink.drain()
+
+
+def stream_zip_size(paths: List[str]) -> Optional[int]:
+    # Exact length of stream_zip's output, so the client can show progress.
+    # Only computed for archives that need no Zip64 records; None otherwise.
+    total = 22  # end of central directory record
+    for path in paths:
+        name_len = len(os.path.basename(path).encode("utf-8"))
+        # local header + data + data descriptor + central directory entry
+        total += 30 + name_len + os.path.getsize(path) + 16 + 46 + name_len
+    if len(paths) >= 0xFFFF or total * 1.05 > zipfile.ZIP64_LIMIT:
+        return None
+    return total
+
+
+# Cache dir path -> [lock, jobs holding or waiting for it]; entries are
+# dropped once unused so the dict doesn't grow with every link ever seen
+_cache_dir_locks: Dict[str, List[Any]] = {}
+_cache_dir_locks_guard = threading.Lock()
+
+
+@contextlib.contextmanager
+def cache_dir_lock(path: str, on_wait: Any = None) -> Generator[None, None, None]:
+    with _cache_dir_locks_guard:
+        entry = _cache_dir_locks.setdefault(path, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        if not entry[0].acquire(blocking=False):
+            if on_wait is not None:
+                on_wait()
+            entry[0].acquire()
+        try:
+            yield
+        finally:
+            entry[0].release()
+    finally:
+        with _cache_dir_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _cache_dir_locks[path]
+
+
+def get_cache_dir(url: str, job_type: str = "") -> str:
     import re
 
     normalized_url = url
@@ -589,19 +1473,110 @@ def get_cache_dir(url: str) -> str:
         if match:
             normalized_url = f"https://www.youtube.com/watch?v={match.group(1)}"
 
-    url_hash = hashlib.md5(normalized_url.encode("utf-8")).hexdigest()
+    # Job types leave different files behind (e.g. m4a vs mp3 tracks), so each
+    # one gets its own cache for the same URL.
+    url_hash = hashlib.md5(f"{job_type}:{normalized_url}".encode("utf-8")).hexdigest()
     return os.path.join(APP_TEMP_DIR, f"cache_{url_hash}")
 
 
-# --- (sanitize_filename - unchanged) ---
+def run_ffmpeg(command: List[str], input_text: Optional[str] = None) -> tuple[int, str]:
+    # Keeps only the last FFMPEG_LOG_LINES of stderr (enough to explain a
+    # failure) instead of buffering the whole log in memory
+    with subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE if input_text is not None else subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    ) as process:
+        if input_text is not None:
+            assert process.stdin is not None
+            process.stdin.write(input_text)
+            process.stdin.close()
+        assert process.stderr is not None
+        tail = collections.deque(process.stderr, maxlen=FFMPEG_LOG_LINES)
+        returncode = process.wait()
+    return returncode, "".join(tail)
+
+
+def id3v2_size(head: bytes) -> int:
+    # Total length of the ID3v2 tag starting a file, given its first 10 bytes
+    if head[:3] != b"ID3" or len(head) < 10:
+        return 0
+    size = (
+        (head[6] & 0x7F) << 21
+        | (head[7] & 0x7F) << 14
+        | (head[8] & 0x7F) << 7
+        | (head[9] & 0x7F)
+    )
+    footer = 10 if head[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def skip_id3v2(f: BinaryIO) -> None:
+    # Positions `f` just past a leading ID3v2 tag (at 0 if there is none)
+    f.seek(id3v2_size(f.read(10)))
+
+
+def stream_concat(paths: List[str]) -> Generator[bytes, None, None]:
+    # Joins MP3 tracks frame-for-frame. Only the first track keeps its ID3v2
+    # tag; later tags would sit mid-stream, where some players glitch or stop.
+    for i, path in enumerate(paths):
+        with open(path, "rb") as src:
+            fadvise(src.fileno(), "POSIX_FADV_SEQUENTIAL")
+            if i > 0:
+                skip_id3v2(src)
+            while True:
+                chunk = src.read(1 << 20)
+                if not chunk:
+                    break
+                yield chunk
+            fadvise(src.fileno(), "POSIX_FADV_DONTNEED")
+
+
+def stream_concat_size(paths: List[str]) -> int:
+    total = 0
+    for i, path in enumerate(paths):
+        with open(path, "rb") as f:
+            total += os.fstat(f.fileno()).st_size
+            if i > 0:
+                total -= id3v2_size(f.read(10))
+    return total
+
+
+def read_mp3_format(path: str) -> Optional[tuple[int, int]]:
+    # Returns the (MPEG version, sample rate) bits of the first frame header,
+    # skipping a leading ID3v2 tag, or None if no frame sync is found.
+    try:
+        with open(path, "rb") as f:
+            skip_id3v2(f)
+            data = f.read(4096)
+    except OSError:
+        return None
+
+    for i in range(len(data) - 2):
+        if data[i] == 0xFF and (data[i + 1] & 0xE0) == 0xE0:
+            return (data[i + 1] >> 3) & 0x3, (data[i + 2] >> 2) & 0x3
+    return None
+
+
+# Characters Windows forbids in file names, mapped for a single translate() pass
+_SANITIZE_TABLE = str.maketrans(dict.fromkeys('<>:"/\\|?*', "_"))
+
+
 def sanitize_filename(filename: str) -> str:
-    invalid_chars = '<>:"/\\|?*'
-    for char in invalid_chars:
-        filename = filename.replace(char, "_")
-    filename = " ".join(filename.split())
+    filename = " ".join(filename.translate(_SANITIZE_TABLE).split())
     return filename.strip().rstrip(".")
 
 
+def attachment_header(file_name: str) -> str:
+    # quote() returns early when every byte is already URL-safe; only names
+    # with spaces or non-ASCII characters pay for percent-encoding
+    return f'attachment; filename="{quote(file_name)}"'
+
+
 def sanitize_url_for_job(url: str, job_type: str) -> str:
     # If the user wants a single file, remove playlist data to prevent loops
     if job_type in ["singleVideo", "singleMp3"]:
@@ -611,6 +1586,15 @@ def sanitize_url_for_job(url: str, job_type: str) -> str:
             if match:
                 return f"https://www.youtube.com/watch?{match.group(1)}"
     return url
+
+
+@functools.lru_cache(maxsize=None)
+def find_executable(name: str) -> Optional[str]:
+    # shutil.which walks and stats every PATH entry; the answer doesn't change
+    # for the lifetime of the process.
+    return shutil.which(name)
+
+
 # --- (resolve_ffmpeg_path - unchanged) ---
 def resolve_ffmpeg_path(candidate: str) -> str:
     if os.path.isdir(candidate):
@@ -623,7 +1607,7 @@ def resolve_ffmpeg_path(candidate: str) -> str:
     ffmpeg_exe = os.path.abspath(candidate)
     ffmpeg_dir = os.path.dirname(ffmpeg_exe)
     if candidate in ("ffmpeg", "ffmpeg.exe"):
-        found = shutil.which(candidate)
+        found = find_executable(candidate)
         if found:
             candidate = found
     if not os.path.exists(candidate):
@@ -645,7 +1629,7 @@ def resolve_ffmpeg_path(candidate: str) -> str:
         os.environ["PATH"] = ffmpeg_dir + os.pathsep + os.environ["PATH"]
         print(f"--- Added to PATH: {ffmpeg_dir} ---", flush=True)
     global node_exe
-    node_path = shutil.which("node") or shutil.which("node.exe")
+    node_path = find_executable("node") or find_executable("node.exe")
     if not node_path:
         possible_node = [
             os.path.join(BASE_DIR, "node_modules", ".bin", "node.exe"),
@@ -675,23 +1659,155 @@ def resolve_ffmpeg_path(candidate: str) -> str:
     return candidate
 
 
-# --- (cleanup_old_job_dirs - unchanged) ---
 def cleanup_old_job_dirs() -> None:
     now = time.time()
-    for dirname in os.listdir(APP_TEMP_DIR):
-        dirpath = os.path.join(APP_TEMP_DIR, dirname)
-        if os.path.isdir(dirpath):
+    # DirEntry carries the type from the directory listing and caches its stat,
+    # so each entry costs at most one stat call
+    with os.scandir(APP_TEMP_DIR) as it:
+        for entry in it:
             try:
-                uuid.UUID(dirname, version=4)
-                dir_age = now - os.path.getmtime(dirpath)
+                if not entry.is_dir():
+                    continue
+                uuid.UUID(entry.name, version=4)
+                dir_age = now - entry.stat().st_mtime
                 if dir_age > 86400:  # 24 hours
-                    print(f"Cleaning up old temp directory: {dirpath}")
-                    shutil.rmtree(dirpath, ignore_errors=True)
+                    print(f"Cleaning up old temp directory: {entry.path}")
+                    shutil.rmtree(entry.path, ignore_errors=True)
             except (ValueError, OSError):
                 continue
 
 
-cleanup_old_job_dirs()
+def dir_size(path: str) -> int:
+    total = 0
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                total += dir_size(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                total += entry.stat(follow_symlinks=False).st_size
+    return total
+
+
+# Cache dir name -> /download responses still reading from it
+_serving_cache_dirs: collections.Counter = collections.Counter()
+_serving_cache_dirs_lock = threading.Lock()
+
+
+def hold_cache_dir(job: "Job") -> Any:
+    # Keeps the reaper off a job's dirs while /download streams from them and
+    # marks them as just used; returns the release callback for call_on_close
+    name = os.path.basename(job.temp_dir)
+    with _serving_cache_dirs_lock:
+        _serving_cache_dirs[name] += 1
+    for path in {job.temp_dir, job.output_dir}:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    released = False
+
+    def release() -> None:
+        nonlocal released
+        with _serving_cache_dirs_lock:
+            if released:
+                return
+            released = True
+            _serving_cache_dirs[name] -= 1
+            if not _serving_cache_dirs[name]:
+                del _serving_cache_dirs[name]
+
+    return release
+
+
+def reap_cache_dirs() -> None:
+    # Never touched: dirs of jobs that are still running (or paused), of jobs
+    # that finished within JOB_TTL (their results may not be downloaded yet)
+    # and of jobs a /download is streaming from right now
+    cutoff = time.time() - JOB_TTL
+    with _serving_cache_dirs_lock:
+        in_use = set(_serving_cache_dirs)
+    for job in list(jobs.values()):
+        if job.finished_at is None or job.finished_at >= cutoff:
+            in_use.add(os.path.basename(job.temp_dir))
+
+    candidates = []  # (last used, size, path)
+    total = 0  # protected dirs count against the budget too
+    for root in {APP_TEMP_DIR, OUTPUT_DIR}:
+        with os.scandir(root) as it:
+            for entry in it:
+                if not entry.name.startswith("cache_"):
+                    continue
+                try:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    size = dir_size(entry.path)
+                    total += size
+                    if entry.name not in in_use:
+                        candidates.append((entry.stat().st_mtime, size, entry.path))
+                except OSError:
+                    continue
+
+    candidates.sort()
+    cutoff = time.time() - CACHE_MAX_AGE
+    for mtime, size, path in candidates:
+        if mtime >= cutoff and total <= CACHE_MAX_BYTES:
+            break
+        print(f"Reaping cache directory: {path}", flush=True)
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+
+def evict_finished_jobs() -> None:
+    # Only the registry entry goes: output files live in shared cache dirs,
+    # which reap_cache_dirs ages out on its own schedule
+    finished = sorted(
+        (job.finished_at, job_id)
+        for job_id, job in list(jobs.items())
+        if job.finished_at is not None
+    )
+    cutoff = time.time() - JOB_TTL
+    excess = len(finished) - JOBS_HIGH_WATER
+    evicted = 0
+    for finished_at, job_id in finished:
+        if finished_at >= cutoff and evicted >= excess:
+            break
+        jobs.pop(job_id, None)
+        evicted += 1
+    if evicted:
+        print(f"Evicted {evicted} finished jobs ({len(jobs)} remain)", flush=True)
+
+
+def cache_reaper() -> None:
+    while True:
+        try:
+            evict_finished_jobs()
+            reap_cache_dirs()
+        except Exception as e:
+            print(f"Cache reaper error: {e}", file=sys.stderr, flush=True)
+        time.sleep(REAP_INTERVAL)
+
+
+def restore_finished_jobs(store: JobStore) -> None:
+    # Results older than the cache lifetime are gone (or about to be) anyway
+    try:
+        rows = store.load(CACHE_MAX_AGE)
+    except sqlite3.Error as e:
+        print(f"Warning: could not load finished jobs: {e}", flush=True)
+        return
+    for row in rows:
+        if row["file_path"] and not os.path.exists(row["file_path"]):
+            continue
+        jobs.setdefault(row["job_id"], Job.restore(row))
+
+
+def start_background_services() -> None:
+    global job_store
+    job_store = JobStore(os.path.join(APP_TEMP_DIR, "jobs.sqlite3"))
+    restore_finished_jobs(job_store)
+    # Deleting stale job dirs is a pile of unlink calls; keep it off the startup path.
+    executor.submit(cleanup_old_job_dirs)
+    threading.Thread(target=cache_reaper, name="cache-reaper", daemon=True).start()
 
 
 # --- Flask Routes ---
@@ -712,7 +1828,9 @@ def get_formats_endpoint() -> Union[Response, tuple[Response, int]]:
             print("CRITICAL: Received cookie data in the URL field. Rejecting request.")
             return jsonify({"error": "Invalid URL provided."}), 400
 
-        cookies = data.get("cookies")
+        cookies = (data.get("cookies") or "").strip()
+        cache_key = metadata_cache_key(url, cookies)
+        info = metadata_cache.get(cache_key)
 
         print(f"\n--- [get-formats] Received request for URL: {url}", flush=True)
         print(
@@ -720,27 +1838,11 @@ def get_formats_endpoint() -> Union[Response, tuple[Response, int]]:
             flush=True,
         )
 
-        ydl_opts: Dict[str, Any] = {
-            "verbose": True,
-            "quiet": True,
-            "no_warnings": True,
-            "restrictfilenames": False,
-            "windowfilenames":True,
-            "format": "bestvideo+bestaudio/best",
-            "extract_flat": False,
-            "javascript_runtimes": ['deno','node'],
-            "check_formats": False,
-            "nocheckcertificate": True,
-            "noplaylist": True,
-        }
+        ydl_opts: Dict[str, Any] = dict(FORMATS_YDL_OPTS)
 
-        if cookies:
+        if cookies and info is None:
             try:
-                with tempfile.NamedTemporaryFile(
-                    delete=False, mode="w", encoding="utf-8"
-                ) as f:
-                    f.write(cookies)
-                    cookie_file = f.name
+                cookie_file = write_cookie_file(cookies, "cookies_formats_")
                 ydl_opts["cookiefile"] = cookie_file
                 print(
                     f"--- [get-formats] Using temp cookie file: {cookie_file}",
@@ -753,31 +1855,25 @@ def get_formats_endpoint() -> Union[Response, tuple[Response, int]]:
                     flush=True,
                 )
                 pass
-            try:
-                with yt_dlp.YoutubeDL(cast(Any, ydl_opts)) as ydl:
-                    print(
-                        "--- [get-formats] Calling yt-dlp.extract_info...", flush=True
-                    )
-                    # Use a small timeout to prevent hanging on Windows
-                    info = ydl.extract_info(url, download=False) or {}
-                    print(
-                        "--- [get-formats] yt-dlp.extract_info finished successfully.",
-                        flush=True,
-                    )
-            except Exception as e:
-                print(f"\n[CRITICAL BACKEND ERROR]: {str(e)}", flush=True)
-                import traceback
-
-                traceback.print_exc()
-                return jsonify({"error": str(e)}), 500
 
-        with yt_dlp.YoutubeDL(cast(Any, ydl_opts)) as ydl:
-            print("--- [get-formats] Calling yt-dlp.extract_info...", flush=True)
-            info = ydl.extract_info(url, download=False) or {}
-            print("--- [get-formats] yt-dlp.extract_info finished.", flush=True)
+        if info is not None:
+            print("--- [get-formats] Using cached metadata.", flush=True)
+        else:
+            # Cookie requests need their own cookiejar; everything else borrows a
+            # warm instance from the pool
+            with (
+                yt_dlp.YoutubeDL(cast(Any, ydl_opts))
+                if "cookiefile" in ydl_opts
+                else pooled_formats_ydl()
+            ) as ydl:
+                print("--- [get-formats] Calling yt-dlp.extract_info...", flush=True)
+                info = ydl.extract_info(url, download=False) or {}
+                print("--- [get-formats] yt-dlp.extract_info finished.", flush=True)
+            if info:
+                metadata_cache.put(cache_key, info)
 
         unique_formats: Dict[int, Dict[str, Any]] = {}
-        all_formats: List[Dict[str, Any]] = info.get("formats", []) or []
+        all_formats: List[Dict[str, Any]] = info.get("formats") or []
 
         print(f"--- [get-formats] Found {len(all_formats)} total formats.", flush=True)
         if not all_formats:
@@ -786,25 +1882,27 @@ def get_formats_endpoint() -> Union[Response, tuple[Response, int]]:
                 flush=True,
             )
 
-        def get_height(f: Dict[str, Any]) -> int:
-            return int(f.get("height") or 0)
-
-        all_formats.sort(key=get_height, reverse=True)
-
+        # One pass keeps, for each height, the video format with the largest
+        # (known) file size, i.e. the highest bitrate; the first one seen wins
+        # ties. Only the unique heights are sorted below.
+        best_size: Dict[int, int] = {}
         for i, f in enumerate(all_formats):
-            height = get_height(f)
+            height = int(f.get("height") or 0)
             vcodec = f.get("vcodec")
+            filesize = f.get("filesize") or f.get("filesize_approx")
             if i < 15:
                 print(
                     f"  > Format {i}: height={height}, vcodec='{vcodec}', acodec='{f.get('acodec')}', ext='{f.get('ext')}'",
                     flush=True,
                 )
-            if not height or height in unique_formats:
+            if not height or (
+                height in unique_formats and (filesize or 0) <= best_size[height]
+            ):
                 if i < 15:
-                    print(f"    -> SKIPPING (height is 0 or duplicate)", flush=True)
+                    print(f"    -> SKIPPING (height is 0 or not larger)", flush=True)
                 continue
             if vcodec != "none":
-                filesize = f.get("filesize") or f.get("filesize_approx")
+                best_size[height] = filesize or 0
                 note = f.get("ext", "unknown")
                 if filesize:
                     filesize_mb = filesize / (1024 * 1024)
@@ -870,9 +1968,8 @@ def start_job_endpoint() -> Union[Response, tuple[Response, int]]:
         job_id = str(uuid.uuid4())
         job = Job(job_id=job_id, job_type=job_type, data=data)
 
-        with jobs_lock:
-            jobs[job_id] = job
-        job_queue.put(job)
+        jobs[job_id] = job
+        executor.submit(run_job, job)
 
         print(f"Job enqueued: {job_id} ({job_type})")
         return jsonify({"jobId": job_id})
@@ -891,52 +1988,146 @@ def start_job_endpoint() -> Union[Response, tuple[Response, int]]:
         return jsonify({"error": "A processing error occurred. Check console for details."}), 500
 
 
-# --- (get_job_status - unchanged) ---
 @app.route("/job-status", methods=["GET"])
 def get_job_status() -> Union[Response, tuple[Response, int]]:
     job_id = request.args.get("jobId")
     if not job_id:
         return jsonify({"status": "not_found", "error": "Missing jobId"}), 400
 
-    with jobs_lock:
-        job = jobs.get(job_id)
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({"status": "not_found"}), 404
+
+    etag, body = job.status_json()
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    return response.make_conditional(request)
 
+
+def job_events(job: Job) -> Generator[bytes, None, None]:
+    # Reconnect after a second when the stream is closed below
+    yield b"retry: 1000\n\n"
+    deadline = time.monotonic() + SSE_MAX_LIFETIME
+    state: Optional[Mapping[str, Any]] = None
+    while time.monotonic() < deadline:
+        latest = (
+            job.state if state is None else job.wait_for_change(state, SSE_KEEPALIVE)
+        )
+        if latest is state:
+            # Comment line; keeps idle connections from being timed out
+            yield b": keep-alive\n\n"
+            continue
+        state = latest
+        _, body = job.status_json()
+        yield b"data: " + body + b"\n\n"
+        if state["status"] in ("completed", "failed"):
+            return
+
+
+@app.route("/job-stream/<job_id>", methods=["GET"])
+def job_stream(job_id: str) -> Union[Response, tuple[Response, int]]:
+    # Server-sent events: pushes each status snapshot as it is published, so
+    # a client needs one connection instead of polling /job-status
+    job = jobs.get(job_id)
     if not job:
         return jsonify({"status": "not_found"}), 404
+    if not sse_slots.acquire(blocking=False):
+        # Too many open streams: the client should fall back to polling
+        response = jsonify({"error": "Too many event streams; poll /job-status."})
+        response.headers["Retry-After"] = str(SSE_KEEPALIVE)
+        return response, 503
+
+    response = Response(job_events(job), mimetype="text/event-stream")
+    response.call_on_close(sse_slots.release)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+LARGE_BLOCK = 1 << 20  # minimum read size for file downloads without sendfile
 
-    return jsonify(job.to_dict())
+
+def large_block_file_wrapper(file: Any, buffer_size: int = 8192) -> FileWrapper:
+    return FileWrapper(file, max(buffer_size, LARGE_BLOCK))
+
+
+def wrap_served_file(environ: Dict[str, Any], on_close: Any) -> None:
+    # send_file responses are handed to the server as-is, so call_on_close
+    # never runs for them. The server does close the file wrapper once the
+    # body is sent (or the client goes away), so hook that instead. The file
+    # is read front to back, so ask for aggressive read-ahead on the way in.
+    file_wrapper = environ["wsgi.file_wrapper"]
+
+    def wrap(file: Any, buffer_size: int = 8192) -> Any:
+        fadvise(file.fileno(), "POSIX_FADV_SEQUENTIAL")
+        wrapped = file_wrapper(file, buffer_size)
+        close = wrapped.close
+
+        def close_then() -> None:
+            try:
+                close()
+            finally:
+                on_close()
+
+        wrapped.close = close_then
+        return wrapped
+
+    environ["wsgi.file_wrapper"] = wrap
 
 
 @app.route("/download/<job_id>", methods=["GET"])
 def download_file_route(job_id: str) -> Union[Response, tuple[Response, int]]:
-    with jobs_lock:
-        job = jobs.get(job_id)
-
-    if (
-        not job
-        or job.status != "completed"
-        or not job.file_path
-        or not os.path.exists(job.file_path)
-    ):
+    job = jobs.get(job_id)
+
+    if not job or job.status != "completed":
         return jsonify({"error": "Job not found or file is missing."}), 404
 
-    def file_generator(file_path):
-        with open(file_path, "rb") as f:
-            while True:
-                chunk = f.read(8192)
-                if not chunk:
-                    break
-                yield chunk
+    if job.members is not None:
+        if not all(os.path.exists(p) for p in job.members):
+            return jsonify({"error": "Job not found or file is missing."}), 404
+        if job.job_type == "combineMp3":
+            response = Response(stream_concat(job.members), mimetype="audio/mpeg")
+            size: Optional[int] = stream_concat_size(job.members)
+        else:
+            response = Response(stream_zip(job.members), mimetype="application/zip")
+            size = stream_zip_size(job.members)
+        if size is not None:
+            response.headers["Content-Length"] = str(size)
+        response.headers["Content-Disposition"] = job.content_disposition
+        response.call_on_close(hold_cache_dir(job))
+        return response
+
+    if not job.file_path or not os.path.exists(job.file_path):
+        return jsonify({"error": "Job not found or file is missing."}), 404
 
+    # send_file hands the open file to the WSGI server's file_wrapper (sendfile
+    # where supported) and answers Range / If-Modified-Since requests itself.
+    # Werkzeug's dev server has none, so supply one that reads 1 MiB blocks.
+    request.environ.setdefault("wsgi.file_wrapper", large_block_file_wrapper)
+    release = hold_cache_dir(job)
+    file_path = job.file_path
+    whole_file = not request.range
+
+    def on_close() -> None:
+        release()
+        if whole_file:
+            drop_page_cache(file_path)
+
+    wrap_served_file(request.environ, on_close)
+    # No as_attachment/download_name: send_file would build an RFC 6266 header
+    # (with a NFKD ASCII fallback for non-ASCII names) only for it to be replaced
+    try:
+        response = send_file(
+            job.file_path,
+            mimetype="application/octet-stream",
+            conditional=True,
+        )
+    except BaseException:
+        release()
+        raise
     # Reverted to simplified headers for better Electron compatibility
-    final_name = job.file_name if job.file_name else f"{job_id}.mp3"
-    headers = {
-        "Content-Disposition": f'attachment; filename="{quote(final_name)}"',
-        "Content-Type": "application/octet-stream",
-        "Content-Length": str(os.path.getsize(job.file_path)),
-    }
-
-    return Response(file_generator(job.file_path), headers=headers)
+    response.headers["Content-Disposition"] = job.content_disposition
+    return response
 
 
 @app.route("/pause-all-jobs", methods=["POST"])
@@ -947,11 +2138,14 @@ def pause_all_jobs_endpoint() -> Response:
     """
     print("--- API CALL: Pause all jobs ---")
     paused_count = 0
-    with jobs_lock:
-        for job_id, job in jobs.items():
-            if job.status in ["queued", "processing", "downloading", "error"]:
-                job.set_status("paused", "All downloads paused by user/network.")
-                paused_count += 1
+    # Iterate over a copy so jobs enqueued concurrently don't break the loop.
+    for job in list(jobs.values()):
+        if job.set_status_if(
+            ["queued", "processing", "downloading", "error"],
+            "paused",
+            "All downloads paused by user/network.",
+        ):
+            paused_count += 1
 
     return jsonify({"message": f"Paused {paused_count} active/queued jobs."})
 
@@ -963,37 +2157,27 @@ def resume_job_endpoint(job_id: str) -> Union[Response, tuple[Response, int]]:
     The worker will pick it up and the Job.run() method will continue.
     """
     print(f"--- API CALL: Resume job {job_id} ---")
-    with jobs_lock:
-        job = jobs.get(job_id)
+    job = jobs.get(job_id)
 
     if not job:
         return jsonify({"error": "Job not found"}), 404
 
-    if job.status != "paused":
+    if not job.set_status_if(["paused"], "queued", "Job resumed. Waiting for queue..."):
         return jsonify({"message": "Job is not currently paused."}), 400
 
-    job.set_status("queued", "Job resumed. Waiting for queue...")
-
     return jsonify({"message": f"Job {job_id} has been re-queued."})
 
 
-# --- (queue_worker - unchanged) ---
-def queue_worker() -> None:
-    print("--- Worker thread loop entered ---", flush=True)  # Add this log to verify
-    while True:
-        job = job_queue.get()
-        try:
-            job.run()
-        except Exception as e:
-            job.set_status(
-                "failed",
-                message=f"Processing error: {str(e)}",
-                error =traceback.format_exc()
-            )
-            print(f"[WORKER CRASH]:{str(e)}")
-        finally:
-            job_queue.task_done()
-            time.sleep(1)
+def run_job(job: Job) -> None:
+    try:
+        job.run()
+    except Exception as e:
+        job.set_status(
+            "failed",
+            message=f"Processing error: {str(e)}",
+            error =traceback.format_exc()
+        )
+        print(f"[WORKER CRASH]:{str(e)}")
 
 
 if __name__ == "__main__":
@@ -1006,11 +2190,27 @@ if __name__ == "__main__":
     ffmpeg_exe = resolve_ffmpeg_path(ffmpeg_path_arg)
     port = int(port_arg)
 
-    worker_thread = threading.Thread(target=queue_worker, daemon=True)
-    worker_thread.start()
-
     print(f"--- Backend starting on port {port} ---", flush=True)
     print(f"--- Using FFmpeg from: {ffmpeg_exe} ---", flush=True)
-    print("--- Worker thread started ---", flush=True)
+    start_background_services()
+    print(
+        f"--- Job pool ready ({MAX_WORKERS} workers, {MAX_DOWNLOADS} downloads) ---",
+        flush=True,
+    )
     print(f"Flask-Backend-Ready:{port}", flush=True)  # type: ignore[reportArgumentType]
-    app.run(host="127.0.0.1", port=port, debug=False)
+    if serve is not None and not os.environ.get("YTLINK_DEV"):
+        # Waitress keeps a fixed pool of request threads instead of spawning
+        # one per connection; the stdout reconfiguration above still applies
+        serve(
+            app,
+            host="127.0.0.1",
+            port=port,
+            threads=SERVER_THREADS,
+            connection_limit=200,
+            cleanup_interval=30,
+            channel_timeout=3600,
+        )
+    else:
+        # Handle each request on its own thread so status polls never queue
+        # behind a long /get-formats call or a file download
+        app.run(host="127.0.0.1", port=port, debug=False, threaded=True)
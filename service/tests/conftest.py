@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# Keep the app's work dir (cache dirs, job store) out of the real temp dir
+os.environ.setdefault("YTLINK_WORK_DIR", tempfile.mkdtemp(prefix="yt-link-test-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,89 @@
+import pytest
+
+import app
+
+
+class FakeYoutubeDL:
+    def __init__(self) -> None:
+        self.params = {}
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(app.time, "monotonic", clock)
+    monkeypatch.setattr(app, "FRAGMENT_WINDOW_MIN", 2)
+    monkeypatch.setattr(app, "FRAGMENT_WINDOW_MAX", 8)
+    return clock
+
+
+def feed(window: app.FragmentWindow, clock: Clock, speed: float, seconds: int = 6,
+         filename: str = "a.mp4") -> None:
+    # One progress update per second at a steady speed, spanning at least one
+    # FRAGMENT_ADAPT_INTERVAL
+    for _ in range(seconds):
+        clock.now += 1
+        window({"status": "downloading", "speed": speed, "filename": filename})
+
+
+def test_window_starts_at_the_cap(clock):
+    ydl = FakeYoutubeDL()
+    window = app.FragmentWindow(ydl, "job")
+    assert window.window == 8
+    assert ydl.params["concurrent_fragment_downloads"] == 8
+
+
+def test_window_halves_on_drop_and_grows_by_one(clock):
+    ydl = FakeYoutubeDL()
+    window = app.FragmentWindow(ydl, "job")
+    feed(window, clock, 10e6)
+    feed(window, clock, 1e6)
+    assert window.window == 4
+    assert ydl.params["concurrent_fragment_downloads"] == 4
+    feed(window, clock, 5e6)
+    assert window.window == 5
+    assert ydl.params["concurrent_fragment_downloads"] == 5
+
+
+def test_window_stays_within_bounds(clock):
+    ydl = FakeYoutubeDL()
+    window = app.FragmentWindow(ydl, "job")
+    speed = 100e6
+    feed(window, clock, speed)
+    for _ in range(5):
+        speed /= 10
+        feed(window, clock, speed)
+    assert window.window == 2
+    for _ in range(10):
+        speed *= 2
+        feed(window, clock, speed)
+    assert window.window == 8
+    assert ydl.params["concurrent_fragment_downloads"] == 8
+
+
+def test_new_download_keeps_window_and_restarts_measurement(clock):
+    ydl = FakeYoutubeDL()
+    window = app.FragmentWindow(ydl, "job")
+    feed(window, clock, 10e6)
+    feed(window, clock, 1e6)
+    assert window.window == 4
+    # A slower next file is not a throughput drop of the previous one
+    feed(window, clock, 0.1e6, filename="b.mp4")
+    assert window.window == 4
+
+
+def test_ignores_updates_without_speed(clock):
+    ydl = FakeYoutubeDL()
+    window = app.FragmentWindow(ydl, "job")
+    for status, speed in (("downloading", None), ("finished", 1e6), ("downloading", 0)):
+        clock.now += 10
+        window({"status": status, "speed": speed, "filename": "a.mp4"})
+    assert window.window == 8
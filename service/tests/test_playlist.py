@@ -0,0 +1,54 @@
+import queue
+import threading
+
+import app
+
+
+class FakeYoutubeDL:
+    # Stands in for a per-entry YoutubeDL running with ignoreerrors: a failed
+    # download comes back as None instead of raising
+    def __init__(self, job: app.Job, pause_on_call: int = 0) -> None:
+        self.job = job
+        self.pause_on_call = pause_on_call
+        self.params = {}
+        self.calls = 0
+
+    def process_ie_result(self, ie_result, download=True, extra_info=None):
+        self.calls += 1
+        if self.calls == self.pause_on_call:
+            # What the progress hook does when the user pauses mid-download
+            self.job.set_status("paused", "Paused by user.")
+            threading.Timer(0.05, self.job.set_status, ("queued", "Resumed.")).start()
+            return None
+        if self.pause_on_call == 0:
+            return None
+        return {**ie_result, **(extra_info or {})}
+
+
+def make_job() -> app.Job:
+    return app.Job(
+        "test-job", "playlistZip", {"url": "https://www.youtube.com/playlist?list=PLtest"}
+    )
+
+
+def download_entry(job: app.Job, ydl: FakeYoutubeDL) -> None:
+    ydls: queue.Queue = queue.Queue()
+    ydls.put(ydl)
+    entry = {"_type": "url", "id": "abc", "url": "https://youtu.be/abc"}
+    job._download_entry(ydls, entry, {"playlist_index": 1})
+    assert ydls.get_nowait() is ydl
+
+
+def test_entry_interrupted_by_pause_is_fetched_after_resume():
+    job = make_job()
+    ydl = FakeYoutubeDL(job, pause_on_call=1)
+    download_entry(job, ydl)
+    assert ydl.calls == 2
+    assert job.status == "queued"
+
+
+def test_failed_entry_without_pause_is_skipped():
+    job = make_job()
+    ydl = FakeYoutubeDL(job)
+    download_entry(job, ydl)
+    assert ydl.calls == 1
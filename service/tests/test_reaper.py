@@ -0,0 +1,68 @@
+import os
+import time
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def work_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "APP_TEMP_DIR", str(tmp_path))
+    monkeypatch.setattr(app, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(app, "jobs", {})
+    # Every dir is over budget, so only protection keeps one around
+    monkeypatch.setattr(app, "CACHE_MAX_BYTES", 0)
+    return tmp_path
+
+
+def make_finished_job(job_id: str, finished_ago: float) -> app.Job:
+    job = app.Job(job_id, "singleMp3", {"url": f"https://youtu.be/{job_id}"})
+    os.makedirs(job.temp_dir)
+    with open(os.path.join(job.temp_dir, "track.mp3"), "wb") as f:
+        f.write(b"x" * 1024)
+    job.status = "completed"
+    job.finished_at = time.time() - finished_ago
+    app.jobs[job_id] = job
+    return job
+
+
+def test_recently_finished_job_is_kept(work_dir):
+    recent = make_finished_job("recent", 60)
+    old = make_finished_job("old", app.JOB_TTL + 60)
+    app.reap_cache_dirs()
+    assert os.path.isdir(recent.temp_dir)
+    assert not os.path.isdir(old.temp_dir)
+
+
+def test_dir_being_downloaded_is_kept_until_released(work_dir):
+    job = make_finished_job("old", app.JOB_TTL + 60)
+    release = app.hold_cache_dir(job)
+    app.reap_cache_dirs()
+    assert os.path.isdir(job.temp_dir)
+    release()
+    app.reap_cache_dirs()
+    assert not os.path.isdir(job.temp_dir)
+
+
+def test_protected_dirs_count_against_the_budget(work_dir, monkeypatch):
+    monkeypatch.setattr(app, "CACHE_MAX_BYTES", 1536)
+    make_finished_job("recent", 60)
+    old = make_finished_job("old", app.JOB_TTL + 60)
+    # 2 KiB on disk in total: the old dir goes even though it alone fits
+    app.reap_cache_dirs()
+    assert not os.path.isdir(old.temp_dir)
+
+
+def test_download_holds_the_dir_until_the_response_is_closed(work_dir):
+    job = make_finished_job("old", app.JOB_TTL + 60)
+    job.file_path = os.path.join(job.temp_dir, "track.mp3")
+    job.file_name = "track.mp3"
+    job.content_disposition = app.attachment_header(job.file_name)
+    response = app.app.test_client().get("/download/old")
+    assert response.data == b"x" * 1024
+    app.reap_cache_dirs()
+    assert os.path.isdir(job.temp_dir)
+    response.close()
+    app.reap_cache_dirs()
+    assert not os.path.isdir(job.temp_dir)